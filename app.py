@@ -2,7 +2,11 @@ import os
 import json
 import uuid
 import time
+import threading
 import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+from collections import OrderedDict
 from datetime import datetime
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 from dotenv import load_dotenv
@@ -12,7 +16,7 @@ from google import genai
 from google.genai import types
 
 # Importamos la lógica robusta (asegúrate de que insights.py tenga el código que me pasaste)
-from insights import clean_dataframe, apply_global_filters, process_component_data
+from insights import clean_dataframe, apply_global_filters, process_component_data, build_time_rollups
 
 load_dotenv()
 
@@ -39,6 +43,16 @@ for d in [DATA_DIR, UPLOAD_FOLDER, DASHBOARD_DIR]:
 if not os.path.exists(USERS_FILE):
     with open(USERS_FILE, 'w') as f: json.dump({}, f)
 
+# Almacén compartido de datasets limpios (Arrow mapeado en memoria, común a todos los workers).
+# DATASET_CACHE_MB limita el tamaño TOTAL del almacén, no el de cada worker.
+DATASET_STORE_DIR = os.path.join(DATA_DIR, 'datasets')
+DATASET_CACHE_MB = int(os.getenv("DATASET_CACHE_MB", 512))
+DATASET_HANDLES = int(os.getenv("DATASET_HANDLES", 16))  # handles ligeros por worker
+WARMUP_DATASETS = int(os.getenv("WARMUP_DATASETS", 5))
+# Log de último uso para el warm-up: cada proceso AÑADE líneas (como mucho una por dataset e intervalo)
+USAGE_FILE = os.path.join(DATA_DIR, 'dataset_usage.log')
+DATASET_USAGE_INTERVAL = 600  # segundos
+
 # ==========================================
 # CONFIGURACIÓN IA (GEMINI)
 # ==========================================
@@ -63,6 +77,7 @@ Genera un JSON con:
 2. **GRÁFICO BARRAS:** Comparativa.
 3. **GRÁFICO PIE:** Distribución.
 4. **MAPA:** Solo si hay lat/lon o X/Y.
+5. **GRÁFICO LÍNEA:** Solo si hay una columna de fecha (datetime). Evolución temporal con "granularity": "day", "week", "month", "year" o "auto".
 
 ESTRUCTURA JSON DE RESPUESTA:
 {
@@ -84,6 +99,10 @@ ESTRUCTURA JSON DE RESPUESTA:
     {
       "id": "map1", "type": "map", "title": "...",
       "config": { "lat": "Y", "lon": "X", "label": "name" }
+    },
+    {
+      "id": "line1", "type": "line", "title": "...",
+      "config": { "x": "COLUMNA_FECHA", "y": "VALOR", "operation": "sum", "granularity": "auto" }
     }
   ]
 }
@@ -112,6 +131,219 @@ def read_file_robust(filepath):
         df.columns = df.columns.astype(str).str.strip()
         return df
 
+# ==========================================
+# ALMACÉN COMPARTIDO DE DATASETS (ARROW)
+# ==========================================
+
+# Cada dataset se limpia UNA vez y se guarda como Feather (Arrow) sin comprimir en DATASET_STORE_DIR.
+# Los workers lo abren con memory_map: las páginas las comparte el sistema operativo entre procesos,
+# así que cada worker solo guarda handles ligeros (DataFrames que apuntan al mapeo, de SOLO LECTURA).
+
+_dataset_handles = OrderedDict()  # ruta relativa -> DataFrame mapeado en memoria
+_dataset_cache_lock = threading.Lock()
+_dataset_last_use = {}  # ruta relativa -> último registro hecho por este proceso
+
+def load_dataset_usage():
+    """Fusiona el log de usos: ruta relativa -> último uso registrado por cualquier proceso."""
+    usage = {}
+    try:
+        with open(USAGE_FILE) as f:
+            for line in f:
+                try: rel_path, ts = json.loads(line)
+                except (ValueError, TypeError): continue
+                usage[rel_path] = max(ts, usage.get(rel_path, 0))
+    except OSError: pass
+    return usage
+
+def record_dataset_use(rel_path):
+    """Añade el uso al log, como mucho una vez cada DATASET_USAGE_INTERVAL por dataset."""
+    now = time.time()
+    with _dataset_cache_lock:
+        if now - _dataset_last_use.get(rel_path, 0) < DATASET_USAGE_INTERVAL: return
+        _dataset_last_use[rel_path] = now
+    # Solo append (una línea corta por escritura): los workers no se pisan entre sí
+    try:
+        with open(USAGE_FILE, 'a') as f: f.write(json.dumps([rel_path, now]) + "\n")
+    except OSError: pass
+
+def compact_dataset_usage():
+    """Reescribe el log con una línea por dataset. Se llama en el warm-up, antes de crear workers."""
+    usage = load_dataset_usage()
+    try:
+        tmp = f"{USAGE_FILE}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'w') as f:
+            for rel_path, ts in usage.items(): f.write(json.dumps([rel_path, ts]) + "\n")
+        os.replace(tmp, USAGE_FILE)
+    except OSError: pass
+    return usage
+
+def dataset_store_path(rel_path):
+    return os.path.join(DATASET_STORE_DIR, f"{rel_path}.feather")
+
+def write_dataset_store(df, store_path):
+    """
+    Escribe el DataFrame limpio como Feather mapeable sin copias: un único chunk y los NaN de
+    columnas float como NaN (no como nulos de Arrow), para que numpy pueda apuntar al mapeo.
+    """
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        # Columnas object mezcladas (p. ej. Excel): Arrow necesita un tipo único
+        if df[col].dtype == 'object':
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, col in enumerate(df.columns):
+        if df[col].dtype.kind == 'f':
+            table = table.set_column(i, col, pa.array(df[col].to_numpy(), from_pandas=False))
+
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    tmp = f"{store_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        feather.write_feather(table, tmp, compression='uncompressed', chunksize=max(len(df), 1))
+        os.replace(tmp, store_path)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+
+def trim_dataset_store(keep=None):
+    """Borra del almacén los datasets usados hace más tiempo hasta caber en DATASET_CACHE_MB."""
+    usage = load_dataset_usage()
+    entries = []
+    for root, _, files in os.walk(DATASET_STORE_DIR):
+        for name in files:
+            if not name.endswith('.feather'): continue
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, DATASET_STORE_DIR)[:-len('.feather')]
+            try: entries.append((usage.get(rel_path, os.path.getmtime(path)), rel_path, path, os.path.getsize(path)))
+            except OSError: continue
+
+    total = sum(e[3] for e in entries)
+    limit = DATASET_CACHE_MB * 1024 * 1024
+    for _, rel_path, path, size in sorted(entries):
+        if total <= limit: break
+        if rel_path == keep: continue
+        # Los workers que ya lo tengan mapeado siguen funcionando; lo detectan y sueltan el handle
+        try: os.remove(path)
+        except OSError: continue
+        total -= size
+
+def materialize_dataset(rel_path):
+    """
+    Lee y limpia el archivo subido y lo guarda en el almacén compartido.
+    Devuelve el DataFrame solo si no se pudo guardar en Arrow (el llamador lo usa como copia privada).
+    """
+    df = clean_dataframe(read_file_robust(os.path.join(UPLOAD_FOLDER, rel_path)))
+    try:
+        write_dataset_store(df, dataset_store_path(rel_path))
+    except (pa.ArrowException, OSError, ValueError, TypeError) as e:
+        print(f"Almacén Arrow: no se pudo guardar {rel_path}: {e}")
+        return df
+    trim_dataset_store(keep=rel_path)
+    return None
+
+def get_dataset(rel_path, record_use=True):
+    """
+    Devuelve el DataFrame limpio de un archivo subido, mapeado desde el almacén compartido
+    (se materializa en el primer uso). El resultado es de SOLO LECTURA.
+    """
+    if record_use: record_dataset_use(rel_path)
+    store_path = dataset_store_path(rel_path)
+
+    with _dataset_cache_lock:
+        df = _dataset_handles.get(rel_path)
+        if df is not None:
+            if os.path.exists(store_path):
+                _dataset_handles.move_to_end(rel_path)
+                return df
+            del _dataset_handles[rel_path]  # expulsado del almacén por otro proceso
+
+    if not os.path.exists(store_path):
+        df = materialize_dataset(rel_path)
+        if df is not None: return df
+
+    # split_blocks evita que pandas consolide (y copie) las columnas del mismo tipo
+    df = feather.read_table(store_path, memory_map=True).to_pandas(split_blocks=True)
+
+    with _dataset_cache_lock:
+        _dataset_handles[rel_path] = df
+        _dataset_handles.move_to_end(rel_path)
+        while len(_dataset_handles) > DATASET_HANDLES:
+            _dataset_handles.popitem(last=False)
+    return df
+
+def warm_up_datasets(limit=None):
+    """
+    Deja listos en el almacén compartido los datasets usados más recientemente (arranque en
+    producción): materializa los que falten y lee los existentes para calentar la caché del SO.
+    """
+    limit = WARMUP_DATASETS if limit is None else limit
+    usage = compact_dataset_usage()
+    candidates = []
+    for root, _, files in os.walk(UPLOAD_FOLDER):
+        for name in files:
+            if name.endswith(('.csv', '.xlsx', '.xls')):
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, UPLOAD_FOLDER)
+                # Sin registro de uso (subidas antiguas) usamos la fecha del archivo
+                candidates.append((usage.get(rel_path, os.path.getmtime(full_path)), rel_path))
+    candidates.sort(reverse=True)
+
+    loaded = []
+    for _, rel_path in candidates[:limit]:
+        try:
+            store_path = dataset_store_path(rel_path)
+            if not os.path.exists(store_path):
+                materialize_dataset(rel_path)
+            if os.path.exists(store_path):
+                with open(store_path, 'rb') as f:
+                    while f.read(16 * 1024 * 1024): pass
+            loaded.append(rel_path)
+        except Exception as e:
+            print(f"Warm-up: no se pudo cargar {rel_path}: {e}")
+    return loaded
+
+# Rollups ya cargados (por proceso): evita leer el pickle en cada petición de filtro
+ROLLUP_CACHE_ENTRIES = int(os.getenv("ROLLUP_CACHE_ENTRIES", 32))
+_rollup_cache = OrderedDict()  # ruta del pickle -> rollups
+_rollup_cache_lock = threading.Lock()
+
+def rollups_path(user_id, dash_id):
+    return os.path.join(DASHBOARD_DIR, user_id, f"{dash_id}.rollups.pkl")
+
+def cache_time_rollups(path, rollups):
+    with _rollup_cache_lock:
+        _rollup_cache[path] = rollups
+        _rollup_cache.move_to_end(path)
+        while len(_rollup_cache) > ROLLUP_CACHE_ENTRIES:
+            _rollup_cache.popitem(last=False)
+    return rollups
+
+def drop_time_rollups(path):
+    with _rollup_cache_lock:
+        _rollup_cache.pop(path, None)
+    if os.path.exists(path): os.remove(path)
+
+def component_x_cols(components, c_type):
+    """Columnas X de los componentes de un tipo (chart: filtros posibles, line: fechas)."""
+    return [c['config']['x'] for c in components if c.get('type') == c_type and c.get('config', {}).get('x')]
+
+def save_time_rollups(path, df, components):
+    """Precalcula los rollups fecha × medida y los guarda junto al dashboard."""
+    rollups = build_time_rollups(df, component_x_cols(components, 'line'), component_x_cols(components, 'chart'))
+    pd.to_pickle(rollups, path)
+    return cache_time_rollups(path, rollups)
+
+def load_time_rollups(path, df, components):
+    """Carga los rollups del dashboard (memoria > pickle); si no existen (dashboards antiguos) los genera."""
+    if not any(c.get('type') == 'line' for c in components): return {}
+    with _rollup_cache_lock:
+        if path in _rollup_cache:
+            _rollup_cache.move_to_end(path)
+            return _rollup_cache[path]
+    if os.path.exists(path):
+        try: return cache_time_rollups(path, pd.read_pickle(path))
+        except Exception: pass
+    return save_time_rollups(path, df, components)
+
 # ==========================================
 # GESTIÓN USUARIOS
 # ==========================================
@@ -207,8 +439,7 @@ def upload_and_analyze():
     file.save(filepath)
 
     try:
-        df = read_file_robust(filepath)
-        df = clean_dataframe(df)
+        df = get_dataset(os.path.join(current_user.id, filename))
         
         # Generamos resumen para la IA
         summary = [f"Archivo: {original_name}", f"Filas: {len(df)}"]
@@ -241,8 +472,7 @@ def generate_dashboard():
     if not os.path.exists(full_path): return jsonify({"error": "Archivo perdido"}), 404
 
     try:
-        df = read_file_robust(full_path)
-        df = clean_dataframe(df)
+        df = get_dataset(data.get('file_path'))
 
         # --- LÓGICA DE FUERZA BRUTA (COLUMN ENFORCER) ---
         # Detectamos si el usuario escribió el nombre de una columna
@@ -285,10 +515,20 @@ def generate_dashboard():
         )
 
         config_json = json.loads(response.text)
+        components = config_json.get('components', [])
+
+        dash_id = str(uuid.uuid4())
+        user_dash_dir = os.path.join(DASHBOARD_DIR, current_user.id)
+        os.makedirs(user_dash_dir, exist_ok=True)
+
+        # Rollups temporales precalculados en la ingesta (los filtros y el zoom los cortan después)
+        rollups = {}
+        if any(c.get('type') == 'line' for c in components):
+            rollups = save_time_rollups(rollups_path(current_user.id, dash_id), df, components)
 
         processed_components = []
-        for comp in config_json.get('components', []):
-            comp_data = process_component_data(df, comp)
+        for comp in components:
+            comp_data = process_component_data(df, comp, rollups)
             if comp_data:
                 comp['data'] = comp_data
                 processed_components.append(comp)
@@ -298,10 +538,6 @@ def generate_dashboard():
             "components": processed_components
         }
 
-        dash_id = str(uuid.uuid4())
-        user_dash_dir = os.path.join(DASHBOARD_DIR, current_user.id)
-        os.makedirs(user_dash_dir, exist_ok=True)
-        
         with open(os.path.join(user_dash_dir, f"{dash_id}.json"), 'w') as f:
             json.dump({
                 "id": dash_id,
@@ -348,30 +584,33 @@ def get_dashboard(dash_id):
 def delete_dashboard(dash_id):
     path = os.path.join(DASHBOARD_DIR, current_user.id, f"{dash_id}.json")
     if os.path.exists(path): os.remove(path)
+    drop_time_rollups(rollups_path(current_user.id, dash_id))
     return jsonify({"message": "OK"})
 
 @app.route("/api/dashboards/<dash_id>/filter", methods=["POST"])
 @login_required
 def filter_dashboard(dash_id):
     filters = request.json.get('filters', {})
+    time_ranges = request.json.get('time_ranges', {})
     path = os.path.join(DASHBOARD_DIR, current_user.id, f"{dash_id}.json")
     if not os.path.exists(path): return jsonify({"error": "404"}), 404
     
     with open(path) as f: dash_data = json.load(f)
-    full_path = os.path.join(UPLOAD_FOLDER, dash_data['file_path'])
     
     try:
-        df = read_file_robust(full_path)
-        df = clean_dataframe(df)
+        df = get_dataset(dash_data['file_path'])
         df_filtered = apply_global_filters(df, filters)
+
+        components = dash_data['config']['components']
+        rollups = load_time_rollups(rollups_path(current_user.id, dash_id), df, components)
         
         updated_components = []
-        for comp in dash_data['config']['components']:
-            new_data = process_component_data(df_filtered, comp)
+        for comp in components:
+            new_data = process_component_data(df_filtered, comp, rollups, filters, time_ranges)
             if new_data:
                 comp['data'] = new_data
                 updated_components.append(comp)
-        return jsonify({"components": updated_components, "active_filters": filters})
+        return jsonify({"components": updated_components, "active_filters": filters, "time_ranges": time_ranges})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
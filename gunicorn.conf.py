@@ -0,0 +1,13 @@
+import os
+
+# Configuración de producción (ver wsgi.py)
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+threads = int(os.getenv("GUNICORN_THREADS", 2))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))  # la generación con Gemini puede tardar
+
+# Imprescindible: el warm-up corre una sola vez en el maestro antes de crear los workers
+preload_app = True
+
+# Memoria: los datasets viven en el almacén Arrow compartido (DATASET_CACHE_MB es su tamaño
+# TOTAL, no por worker). Cada worker solo guarda hasta DATASET_HANDLES handles mapeados.
\ No newline at end of file
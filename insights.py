@@ -82,6 +82,133 @@ def clean_dataframe(df):
 
     return df
 
+# ==========================================
+# SERIES TEMPORALES (ROLLUPS PRECALCULADOS)
+# ==========================================
+
+# Granularidad -> frecuencia de pandas y formato de la etiqueta del eje X
+TIME_GRANULARITIES = {
+    'day': ('D', '%Y-%m-%d'),
+    'week': ('W', '%Y-%m-%d'),
+    'month': ('M', '%Y-%m'),
+    'year': ('Y', '%Y'),
+}
+
+# Dimensiones con más valores distintos no entran en el rollup (sus filtros usan el camino crudo)
+ROLLUP_MAX_DIM_VALUES = 50
+
+def build_time_rollups(df, date_cols, dims=None):
+    """
+    Precalcula, por cada columna de fecha de `date_cols`, una tabla diaria con suma y conteo
+    de cada medida numérica. Las columnas de `dims` (de baja cardinalidad) se guardan como texto
+    para poder aplicar los filtros globales sobre el rollup sin volver a los datos crudos.
+    """
+    datetime_cols = [c for c in dict.fromkeys(date_cols)
+                     if c in df.columns and pd.api.types.is_datetime64_any_dtype(df[c])]
+    measures = [c for c in df.columns
+                if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+    dims = [d for d in dict.fromkeys(dims or [])
+            if d in df.columns and d not in datetime_cols and df[d].nunique() <= ROLLUP_MAX_DIM_VALUES]
+
+    rollups = {}
+    for dt_col in datetime_cols:
+        dates = df[dt_col]
+        if getattr(dates.dt, 'tz', None) is not None:
+            dates = dates.dt.tz_localize(None)
+
+        base = pd.DataFrame({'__bucket': dates.dt.floor('D')}, index=df.index)
+        for d in dims:
+            base[d] = df[d].astype(str)
+        base['__rows'] = 1
+        for m in measures:
+            base[f'{m}__sum'] = df[m]
+            base[f'{m}__n'] = df[m].notna().astype(int)
+
+        base = base.dropna(subset=['__bucket'])
+        # dropna=False: las filas con dimensiones vacías también cuentan en el total
+        table = base.groupby(['__bucket'] + dims, sort=True, dropna=False).sum().reset_index()
+        rollups[dt_col] = {"dims": dims, "measures": measures, "table": table}
+    return rollups
+
+def pick_granularity(start, end):
+    """Elige la granularidad según el rango de fechas visible."""
+    span = (end - start).days
+    if span <= 92: return 'day'
+    if span <= 731: return 'week'
+    if span <= 3653: return 'month'
+    return 'year'
+
+def parse_time_bound(value):
+    """Convierte un límite de rango enviado por el cliente; None si no es una fecha válida."""
+    if not value or not isinstance(value, str): return None
+    try:
+        ts = pd.to_datetime(value, errors='coerce')
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if pd.isna(ts): return None
+    return ts.tz_localize(None) if ts.tzinfo is not None else ts
+
+def query_time_rollup(rollup, config, filters=None, time_range=None):
+    """
+    Corta un rollup por filtros y rango [start, end) y lo reagrega a la granularidad pedida.
+    Devuelve None si el rollup no puede servirla (filtro fuera de sus dimensiones o `y` no numérica).
+    """
+    x = config.get('x')
+    y = config.get('y')
+    op = config.get('operation', 'sum')
+    table = rollup['table']
+
+    filters = filters or {}
+    if any(col not in rollup['dims'] for col in filters): return None
+    for col, val in filters.items():
+        table = table[table[col] == str(val)]
+
+    time_range = time_range if isinstance(time_range, dict) else {}
+    start = parse_time_bound(time_range.get('start'))
+    end = parse_time_bound(time_range.get('end'))
+    if start is not None:
+        table = table[table['__bucket'] >= start]
+    if end is not None:
+        table = table[table['__bucket'] < end]
+
+    if op == 'count':
+        value_cols = ['__rows']
+    elif y in rollup['measures']:
+        value_cols = [f'{y}__sum', f'{y}__n']
+    else:
+        return None
+
+    granularity = config.get('granularity', 'auto')
+    if granularity not in TIME_GRANULARITIES:
+        if not table.empty:
+            granularity = pick_granularity(table['__bucket'].min(), table['__bucket'].max())
+        elif start is not None and end is not None:
+            granularity = pick_granularity(start, end)
+        else:
+            granularity = 'day'
+
+    if table.empty:
+        return {"dimensions": [x, 'value'], "source": [], "granularity": granularity}
+
+    freq, label_fmt = TIME_GRANULARITIES[granularity]
+
+    buckets = table['__bucket'].dt.to_period(freq).dt.start_time
+    df_res = table[value_cols].groupby(buckets).sum()
+
+    if op == 'count':
+        values = df_res['__rows']
+    elif op == 'mean':
+        values = (df_res[f'{y}__sum'] / df_res[f'{y}__n'].replace(0, np.nan)).fillna(0)
+    else:
+        values = df_res[f'{y}__sum']
+
+    df_res = pd.DataFrame({x: values.index.strftime(label_fmt), 'value': values.values})
+    return {
+        "dimensions": [x, 'value'],
+        "source": df_res.to_dict(orient='records'),
+        "granularity": granularity
+    }
+
 def apply_global_filters(df, filters):
     if not filters: return df
     df_filtered = df.copy()
@@ -90,7 +217,7 @@ def apply_global_filters(df, filters):
             df_filtered = df_filtered[df_filtered[col].astype(str) == str(val)]
     return df_filtered
 
-def process_component_data(df, component):
+def process_component_data(df, component, rollups=None, filters=None, time_ranges=None):
     try:
         c_type = component.get('type')
         config = component.get('config', {})
@@ -210,6 +337,28 @@ def process_component_data(df, component):
                 "dimensions": [x, 'value'],
                 "source": df_res.to_dict(orient='records')
             }
+
+        # --- SERIE TEMPORAL ---
+        elif c_type == 'line':
+            x = config.get('x')
+            if not x or x not in df.columns: return []
+            if not pd.api.types.is_datetime64_any_dtype(df[x]): return []
+
+            time_range = (time_ranges or {}).get(x)
+
+            # Camino rápido: cortamos el rollup precalculado en la ingesta
+            rollup = (rollups or {}).get(x)
+            if rollup is not None:
+                result = query_time_rollup(rollup, config, filters, time_range)
+                if result is not None: return result
+
+            # Sin rollup (o filtro fuera de sus dimensiones): lo construimos sobre el df ya filtrado
+            y = config.get('y')
+            df_line = df[[x]].copy()
+            if y and y in df.columns and y != x:
+                df_line[y] = df[y] if pd.api.types.is_numeric_dtype(df[y]) else try_numeric_conversion(df[y])
+            rollup = build_time_rollups(df_line, [x])[x]
+            return query_time_rollup(rollup, config, None, time_range) or []
             
         return None
     except Exception as e:
@@ -5,6 +5,7 @@ let currentFileSummary = null;
 let currentFilePath = null;
 let currentDashId = null; 
 let activeFilters = {};   
+let timeRanges = {};      
 let mapInstances = {}; 
 let pieColorMap = {};
 
@@ -122,6 +123,7 @@ async function deleteDashboard(id, event) {
 async function loadDashboard(id) {
     currentDashId = id;
     activeFilters = {}; 
+    timeRanges = {};
     mapInstances = {}; 
     pieColorMap = {};
     
@@ -159,6 +161,7 @@ function openFullscreen() {
 function resetView() {
     currentDashId = null;
     activeFilters = {};
+    timeRanges = {};
     mapInstances = {};
     pieColorMap = {};
     document.getElementById("inputSection").classList.remove("hidden");
@@ -177,6 +180,20 @@ async function applyFilter(column, value) {
     if (activeFilters[column] === value) delete activeFilters[column]; 
     else activeFilters[column] = value; 
 
+    await refreshDashboardData();
+}
+
+// Zoom de series temporales: el backend recorta el rollup y ajusta la granularidad
+async function applyTimeRange(column, range) {
+    if (!currentDashId) return;
+
+    if (range) timeRanges[column] = range;
+    else delete timeRanges[column];
+
+    await refreshDashboardData();
+}
+
+async function refreshDashboardData() {
     const grid = document.getElementById("dashboardGrid");
     grid.style.opacity = "0.7";
 
@@ -184,12 +201,13 @@ async function applyFilter(column, value) {
         const res = await fetch(`/api/dashboards/${currentDashId}/filter`, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ filters: activeFilters })
+            body: JSON.stringify({ filters: activeFilters, time_ranges: timeRanges })
         });
         
         const data = await res.json();
         updateComponentsData(data.components);
         renderFilterTags();
+        renderZoomTags();
 
     } catch(e) {
         console.error(e);
@@ -223,6 +241,22 @@ function renderFilterTags() {
     });
 }
 
+// El zoom solo afecta a las series temporales: su etiqueta va en la cabecera de cada gráfico de línea
+function renderZoomTags() {
+    document.querySelectorAll("[data-zoom-col]").forEach(tag => {
+        const col = tag.dataset.zoomCol;
+        const range = timeRanges[col];
+        if (!range) {
+            tag.classList.add("hidden");
+            return;
+        }
+        tag.innerHTML = `<span class="truncate max-w-[160px]">🔍 Zoom: ${range.start || '…'} → ${range.end || '…'}</span> <span class="text-[9px]">✕</span>`;
+        tag.title = "Quitar zoom de este gráfico";
+        tag.onclick = () => applyTimeRange(col, null);
+        tag.classList.remove("hidden");
+    });
+}
+
 // --- RENDERIZADO COMPACTO ---
 function renderDashboard(config) {
     const mainContainer = document.getElementById("dashboardGrid");
@@ -243,7 +277,7 @@ function renderDashboard(config) {
 
     const maps = config.components.filter(c => c.type === 'map');
     const kpis = config.components.filter(c => c.type === 'kpi');
-    const charts = config.components.filter(c => c.type === 'chart');
+    const charts = config.components.filter(c => c.type === 'chart' || c.type === 'line');
 
     // SECCIÓN SUPERIOR: 42vh
     if (maps.length > 0) {
@@ -294,7 +328,10 @@ function renderDashboard(config) {
             const card = document.createElement("div");
             card.className = "bg-white p-4 rounded-2xl shadow-sm border border-slate-200 h-[300px] lg:h-full flex flex-col relative";
             
-            const headerHtml = `<div class="mb-1"><h3 class="font-bold text-slate-700 text-sm leading-tight truncate" title="${comp.title}">${comp.title}</h3></div>`;
+            const zoomTagHtml = comp.type === 'line'
+                ? `<button data-zoom-col="${comp.config.x}" class="hidden shrink-0 bg-emerald-50 text-emerald-700 text-[10px] font-bold px-2 py-0.5 rounded-full inline-flex items-center gap-1 hover:bg-red-50 hover:text-red-500 transition"></button>`
+                : '';
+            const headerHtml = `<div class="mb-1 flex items-center justify-between gap-2"><h3 class="font-bold text-slate-700 text-sm leading-tight truncate" title="${comp.title}">${comp.title}</h3>${zoomTagHtml}</div>`;
             const chartId = "chart_" + comp.id;
             card.innerHTML = headerHtml + `<div id="${chartId}" class="flex-grow w-full h-full"></div>`;
             
@@ -309,6 +346,8 @@ function renderDashboard(config) {
     const btnFull = document.getElementById("btnFullscreen");
     if(btnFull) btnFull.classList.remove("hidden");
 
+    renderZoomTags();
+
     setTimeout(autoFitText, 0);
 }
 
@@ -353,6 +392,15 @@ function updateComponentsData(components) {
             if (chartInstance) {
                 chartInstance.setOption({ dataset: { source: comp.data.source } });
             }
+        } else if (comp.type === 'line') {
+            const chartInstance = echarts.getInstanceByDom(document.getElementById("chart_" + comp.id));
+            if (chartInstance) {
+                // Los nuevos datos ya son el rango pedido: reseteamos el zoom visual
+                chartInstance.setOption({
+                    dataset: { source: comp.data.source },
+                    dataZoom: [{ start: 0, end: 100 }, { start: 0, end: 100 }]
+                });
+            }
         } else if (comp.type === 'kpi') {
             const kpiValEl = document.getElementById("kpi_val_" + comp.id);
             if (kpiValEl) {
@@ -410,6 +458,7 @@ function initChart(domId, comp, idx) {
     if (!dom) return;
     const myChart = echarts.init(dom);
     const isPie = comp.chart_type === 'pie';
+    const isLine = comp.type === 'line';
     
     const colors = [
         '#6366f1', '#10b981', '#f59e0b', '#ec4899', 
@@ -439,7 +488,11 @@ function initChart(domId, comp, idx) {
             textStyle: { color: '#1e293b', fontSize: 11 },
             valueFormatter: (value) => formatNumber(value)
         },
-        grid: { left: '2%', right: '3%', bottom: '2%', top: '12%', containLabel: true },
+        grid: { left: '2%', right: '3%', bottom: isLine ? '18%' : '2%', top: '12%', containLabel: true },
+        dataZoom: isLine ? [
+            { type: 'inside' },
+            { type: 'slider', height: 14, bottom: 4, borderColor: '#e2e8f0', textStyle: { fontSize: 9 } }
+        ] : undefined,
         dataset: { dimensions: comp.data.dimensions, source: comp.data.source },
         xAxis: isPie ? { show: false } : { 
             type: 'category', 
@@ -453,7 +506,10 @@ function initChart(domId, comp, idx) {
             axisLabel: { fontSize: 10, color: '#94a3b8' }
         },
         series: [{
-            type: comp.chart_type || 'bar',
+            type: isLine ? 'line' : (comp.chart_type || 'bar'),
+            smooth: isLine || undefined,
+            showSymbol: isLine ? false : undefined,
+            areaStyle: isLine ? { opacity: 0.08 } : undefined,
             radius: isPie ? ['45%', '75%'] : undefined,
             center: isPie ? ['50%', '50%'] : undefined,
             itemStyle: { 
@@ -474,11 +530,35 @@ function initChart(domId, comp, idx) {
     };
     myChart.setOption(option);
     
-    myChart.on('click', function(params) {
-        if (comp.config && comp.config.x && params.name !== 'Otros') {
-            applyFilter(comp.config.x, params.name);
-        }
-    });
+    if (isLine) {
+        // Al terminar el zoom pedimos al backend solo el rango visible [start, end)
+        let zoomTimer = null;
+        myChart.on('datazoom', function() {
+            clearTimeout(zoomTimer);
+            zoomTimer = setTimeout(() => {
+                const source = myChart.getOption().dataset[0].source;
+                const zoom = myChart.getOption().dataZoom[0];
+                // Slider de vuelta a ancho completo: quitamos el rango activo (si lo hay)
+                if (!source.length || (zoom.start === 0 && zoom.end === 100)) {
+                    if (timeRanges[comp.config.x]) applyTimeRange(comp.config.x, null);
+                    return;
+                }
+                const xField = comp.data.dimensions[0];
+                const first = zoom.startValue;
+                const last = zoom.endValue;
+                applyTimeRange(comp.config.x, {
+                    start: first > 0 ? source[first][xField] : null,
+                    end: last < source.length - 1 ? source[last + 1][xField] : null
+                });
+            }, 400);
+        });
+    } else {
+        myChart.on('click', function(params) {
+            if (comp.config && comp.config.x && params.name !== 'Otros') {
+                applyFilter(comp.config.x, params.name);
+            }
+        });
+    }
     
     new ResizeObserver(() => myChart.resize()).observe(dom);
 }
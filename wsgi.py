@@ -0,0 +1,10 @@
+# Punto de entrada de producción:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Con preload_app el warm-up corre UNA vez en el proceso maestro antes del fork: deja los
+# datasets recientes en el almacén Arrow compartido (data/datasets) y en la caché del SO.
+# Cada worker los abre después con memory_map, sin leer ni limpiar su propia copia.
+from app import app, warm_up_datasets
+
+loaded = warm_up_datasets()
+print(f"Warm-up: {len(loaded)} datasets preparados en el almacén compartido")
\ No newline at end of file